@@ -1,78 +1,256 @@
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
 
 import pandas as pd
 
-from bkb_client import download_with_size_escalation
+import bkb_client
+
+try:
+    import async_bkb_client
+except ImportError:  # aiohttp is optional; fall back to threads over the blocking client
+    async_bkb_client = None
+
+if TYPE_CHECKING:
+    import aiohttp
+
+INPUT_FILENAME = Path("Biomarkers_Categorization.xlsx")
 
 # --- Search behaviour configuration ---
 INITIAL_SEARCH_SIZE = 10_000
 MAX_SIZE_ATTEMPTS = 4
+MAX_CONCURRENCY = 16
+
+# Opt-in: send this many names per search call. Only enable it once the API is known to
+# accept a list for biomarker_entity_name; rows are attributed back to the queried
+# names through BATCH_MATCH_COLUMN, and rows matching none of them are dropped.
+SEARCH_BATCH_SIZE: Optional[int] = None
+BATCH_MATCH_COLUMN = "assessed_biomarker_entity"
+
+# Row counts seen on previous runs, used to start the largest downloads first.
+ROW_COUNTS_PATH = bkb_client.CACHE_DIR / "row_counts.json"
 
+# A single biomarker name, or a batch of names sent in one search.
+Query = Union[str, list[str]]
 
-def fetch_biomarker_records(biomarker_name: str) -> Optional[pd.DataFrame]:
+
+def _escalation_options(query: Query) -> dict[str, object]:
     def payload_factory(size: Optional[int]) -> dict[str, object]:
-        payload = {"biomarker_entity_name": biomarker_name}
+        payload = {"biomarker_entity_name": query}
         if size is not None:
             payload["size"] = size
         return payload
 
-    return download_with_size_escalation(
-        payload_factory=payload_factory,
-        description=f"biomarker '{biomarker_name}'",
-        expect_label=biomarker_name,
-        initial_size=INITIAL_SEARCH_SIZE,
-        max_attempts=MAX_SIZE_ATTEMPTS,
+    if isinstance(query, str):
+        description, label = f"biomarker '{query}'", query
+    else:
+        description, label = f"batch of {len(query)} biomarkers", ", ".join(query)
+
+    return {
+        "payload_factory": payload_factory,
+        "description": description,
+        "expect_label": label,
+        "initial_size": INITIAL_SEARCH_SIZE,
+        "max_attempts": MAX_SIZE_ATTEMPTS,
+    }
+
+
+async def fetch_biomarker_records(
+    session: aiohttp.ClientSession, query: Query
+) -> Optional[pd.DataFrame]:
+    return await async_bkb_client.download_with_size_escalation(
+        session, **_escalation_options(query)
     )
 
 
+def fetch_biomarker_records_blocking(query: Query) -> Optional[pd.DataFrame]:
+    return bkb_client.download_with_size_escalation(**_escalation_options(query))
+
+
+async def _fetch_all_async(queries: list[Query]) -> list[Optional[pd.DataFrame]]:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async with async_bkb_client.open_session(MAX_CONCURRENCY) as session:
+        async def fetch(query: Query) -> Optional[pd.DataFrame]:
+            async with semaphore:
+                return await fetch_biomarker_records(session, query)
+
+        return await asyncio.gather(*(fetch(q) for q in queries))
+
+
+def _fetch_all_threaded(queries: list[Query]) -> list[Optional[pd.DataFrame]]:
+    # requests releases the GIL while waiting on sockets, so threads overlap the I/O.
+    results: list[Optional[pd.DataFrame]] = [None] * len(queries)
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(fetch_biomarker_records_blocking, q): i for i, q in enumerate(queries)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def _fetch_queries(queries: list[Query]) -> list[Optional[pd.DataFrame]]:
+    if async_bkb_client is None:
+        return _fetch_all_threaded(queries)
+    return asyncio.run(_fetch_all_async(queries))
+
+
+def _split_batch(batch: list[str], df: pd.DataFrame) -> list[pd.DataFrame]:
+    """Attribute the rows of a batched download back to the names that were queried."""
+    keys = df[BATCH_MATCH_COLUMN].astype(str).str.strip().str.casefold()
+    groups = dict(tuple(df.groupby(keys, sort=False)))
+    frames = [groups.get(name.casefold(), df.iloc[0:0]).reset_index(drop=True) for name in batch]
+
+    unmatched = len(df) - sum(len(frame) for frame in frames)
+    if unmatched:
+        print(f"  ⚠️ Dropped {unmatched} batched rows that matched none of the queried names.")
+    return frames
+
+
+def read_biomarker_list(source: Path = INPUT_FILENAME) -> pd.DataFrame:
+    """Read the input workbook, reusing a Parquet copy while it is newer than the workbook."""
+    parquet_path = bkb_client.CACHE_DIR / f"{source.stem}.parquet"
+    try:
+        if parquet_path.stat().st_mtime > source.stat().st_mtime:
+            return pd.read_parquet(parquet_path)
+    except (OSError, ValueError, ImportError):  # no usable copy yet
+        pass
+
+    blist = pd.read_excel(source)
+    try:
+        parquet_path.parent.mkdir(parents=True, exist_ok=True)
+        blist.to_parquet(parquet_path, index=False)
+    except (OSError, ValueError, TypeError, ImportError):
+        pass
+    return blist
+
+
+def _load_row_counts() -> dict[str, int]:
+    try:
+        row_counts = json.loads(ROW_COUNTS_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return row_counts if isinstance(row_counts, dict) else {}
+
+
+def _save_row_counts(row_counts: dict[str, int]) -> None:
+    try:
+        ROW_COUNTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        ROW_COUNTS_PATH.write_text(json.dumps(row_counts, sort_keys=True), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def _fetch_in_order(biomarkers: list[str]) -> list[Optional[pd.DataFrame]]:
+    if not SEARCH_BATCH_SIZE:
+        return _fetch_queries(biomarkers)
+
+    batches = list(bkb_client.chunk(biomarkers, SEARCH_BATCH_SIZE))
+    results: list[Optional[pd.DataFrame]] = []
+    for batch, df in zip(batches, _fetch_queries(batches)):
+        if df is None or df.empty:
+            results.extend([df] * len(batch))
+        elif BATCH_MATCH_COLUMN in df.columns:
+            results.extend(_split_batch(batch, df))
+        else:
+            print(
+                f"  ⚠️ Batched results lack {BATCH_MATCH_COLUMN!r}; "
+                "querying this batch one biomarker at a time."
+            )
+            results.extend(_fetch_queries(batch))
+    return results
+
+
+def fetch_all_biomarkers(biomarkers: list[str]) -> list[Optional[pd.DataFrame]]:
+    """Fetch every biomarker concurrently, returning results in input order."""
+    row_counts = _load_row_counts()
+    # Largest known downloads start first so the quick ones fill in the tail;
+    # biomarkers without history follow alphabetically.
+    order = sorted(
+        range(len(biomarkers)),
+        key=lambda i: (-row_counts.get(biomarkers[i].casefold(), 0), biomarkers[i].casefold()),
+    )
+    scheduled = [biomarkers[i] for i in order]
+    fetched = _fetch_in_order(scheduled)
+
+    results: list[Optional[pd.DataFrame]] = [None] * len(biomarkers)
+    for i, df in zip(order, fetched):
+        results[i] = df
+    row_counts.update(
+        {name.casefold(): len(df) for name, df in zip(scheduled, fetched) if df is not None}
+    )
+    _save_row_counts(row_counts)
+    return results
 
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
-    blist = pd.read_excel("Biomarkers_Categorization.xlsx")
+    blist = read_biomarker_list()
     print("Read Data successfully:")
-    biomarkers_to_enrich = blist["BioMarker"].dropna().to_list()
+    names = blist["BioMarker"].dropna().astype(str).str.strip()
+    names = names[names != ""]
+    # Case/whitespace variants would repeat identical API calls; keep the first spelling.
+    biomarkers_to_enrich = names[~names.str.casefold().duplicated()].to_list()
+    if len(biomarkers_to_enrich) < len(names):
+        print(f"Skipping {len(names) - len(biomarkers_to_enrich)} duplicate biomarker entries.")
 
     output_filename = "biomarker_results.xlsx"
 
-    all_results = []
+    success_frames: list[tuple[str, pd.DataFrame]] = []
+    placeholder_rows: list[dict[str, object]] = []
     total_biomarkers = len(biomarkers_to_enrich)
     step_1_successes = 0
     step_2_successes = 0
 
-    print("🚀 Starting enrichment process for each biomarker individually...")
-    for biomarker in biomarkers_to_enrich:
-        print("\n" + "=" * 50)
-        print(f"Processing biomarker: {biomarker}")
-        print("=" * 50)
-
-        df = fetch_biomarker_records(biomarker)
+    print(
+        f"🚀 Starting enrichment process for {total_biomarkers} biomarkers "
+        f"({MAX_CONCURRENCY} concurrent requests)..."
+    )
+    fetched = fetch_all_biomarkers(biomarkers_to_enrich)
 
+    for biomarker, df in zip(biomarkers_to_enrich, fetched):
         if df is not None and not df.empty:
             step_1_successes += 1
             step_2_successes += 1
-            df["query_biomarker"] = biomarker
-            all_results.append(df)
+            success_frames.append((biomarker, df))
         else:
-            placeholder = {
-                "query_biomarker": biomarker,
-                "biomarker_canonical_id": "No data found" if df is not None else "Step 1 failed",
-            }
-            all_results.append(pd.DataFrame([placeholder]))
+            placeholder_rows.append(
+                {
+                    "query_biomarker": biomarker,
+                    "biomarker_canonical_id": "No data found" if df is not None else "Step 1 failed",
+                }
+            )
 
-    if all_results:
+    if success_frames or placeholder_rows:
         print("\n" + "#" * 50)
         print("### 📊 Combining all results... ###")
         print("#" * 50)
 
-        final_df = pd.concat(all_results, ignore_index=True)
+        # Labelling through concat keys avoids inserting a column into every frame;
+        # placeholders become a single frame so the final concat sees one extra piece.
+        frames = []
+        if success_frames:
+            frames.append(
+                pd.concat(
+                    [df for _, df in success_frames],
+                    keys=[biomarker for biomarker, _ in success_frames],
+                    names=["query_biomarker"],
+                    sort=False,
+                ).reset_index(level=0)
+            )
+        if placeholder_rows:
+            frames.append(pd.DataFrame(placeholder_rows))
+        final_df = bkb_client.compact_dtypes(pd.concat(frames, ignore_index=True, sort=False))
 
         print(f"📈 Final table has {final_df.shape[0]} rows and {final_df.shape[1]} columns.")
 
         print(f"💾 Saving final results to '{output_filename}'...")
-        final_df.to_excel(output_filename, index=False)
+        bkb_client.write_excel(final_df, output_filename)
         print("  ✅ Done! Your file is ready.")
 
     else:
@@ -4,7 +4,7 @@ from typing import Optional
 
 import pandas as pd
 
-from bkb_client import download_with_size_escalation
+from bkb_client import compact_dtypes, download_with_size_escalation, write_excel
 
 INITIAL_SEARCH_SIZE = 50_000
 MAX_SIZE_ATTEMPTS = 4
@@ -35,6 +35,7 @@ if __name__ == "__main__":
     results_df = fetch_specimen_records(target_specimen)
 
     if results_df is not None and not results_df.empty:
+        results_df = compact_dtypes(results_df)
         print("\n" + "#" * 50)
         print("### 📊 Final Results ###")
         print("#" * 50)
@@ -42,7 +43,7 @@ if __name__ == "__main__":
         print(f"📈 Found {results_df.shape[0]} biomarkers associated with '{target_specimen}'.")
 
         print(f"💾 Saving results to '{output_filename}'...")
-        results_df.to_excel(output_filename, index=False)
+        write_excel(results_df, output_filename)
         print(f"  ✅ Done! Your file '{output_filename}' is ready.")
     else:
         print("\n--- 🤷 No data was found for the specified specimen. ---")
@@ -0,0 +1,238 @@
+"""Asynchronous counterpart of :mod:`bkb_client` built on aiohttp."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import aiohttp
+import pandas as pd
+
+from bkb_client import (
+    API_BASE,
+    DOWNLOAD_PATH,
+    RETRY_BACKOFF,
+    RETRY_BACKOFF_MAX,
+    RETRY_STATUSES,
+    RETRY_TOTAL,
+    SEARCH_PATH,
+    BiomarkerKBError,
+    ListRequest,
+    ListResult,
+    _BUCKET,
+    _cache_store,
+    _default_log,
+    _finish_attempt,
+    _gunzip_if_needed,
+    _has_data_rows,
+    _list_result,
+    _load_cached_attempt,
+    _parse_csv,
+    _probe_size,
+    _resize_for_hits,
+)
+
+MAX_CONCURRENCY = 16
+
+
+def open_session(limit: int = MAX_CONCURRENCY) -> aiohttp.ClientSession:
+    """Create a session whose connection pool is shared by every concurrent fetch."""
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limit))
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """Return the seconds requested by a Retry-After header (delta or HTTP date)."""
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+    """Seconds to wait before retry number *attempt* + 1."""
+    if retry_after:
+        delay = _parse_retry_after(retry_after)
+        if delay is not None:
+            return delay
+    # Same schedule urllib3 applies to the blocking client: the first retry is
+    # immediate, then exponential backoff.
+    if attempt == 0:
+        return 0.0
+    return min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX)
+
+
+async def _post(
+    session: aiohttp.ClientSession,
+    url: str,
+    payload: Dict[str, object],
+    headers: Dict[str, str],
+    timeout: int,
+) -> tuple[int, bytes]:
+    """POST *payload* and return the status code together with the raw body.
+
+    429 and 5xx responses are retried like the blocking client's session does,
+    honouring ``Retry-After`` when the server sends it.
+    """
+    attempt = 0
+    while True:
+        await asyncio.sleep(_BUCKET.reserve())
+        async with session.post(
+            url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status not in RETRY_STATUSES or attempt >= RETRY_TOTAL:
+                response.raise_for_status()
+                return response.status, await response.read()
+            delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def create_list(
+    session: aiohttp.ClientSession, list_request: ListRequest, timeout: int = 60
+) -> ListResult:
+    """Create a BiomarkerKB list and return its identifier and reported hit count."""
+    url = f"{API_BASE}{SEARCH_PATH}"
+    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+
+    try:
+        status, body = await _post(session, url, list_request.payload, headers, timeout)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        raise BiomarkerKBError(
+            f"Search request failed for {list_request.description!r}: {exc}"
+        ) from exc
+
+    try:
+        data = json.loads(body)
+    except ValueError as exc:  # server returned HTML/text instead of JSON
+        raise BiomarkerKBError(
+            "Non-JSON payload received from BiomarkerKB search endpoint. "
+            "Status code: %s. Body snippet: %r" % (status, body[:500].decode("utf-8", "replace"))
+        ) from exc
+
+    return _list_result(data, list_request)
+
+
+async def download_list(
+    session: aiohttp.ClientSession, list_id: str, *, expect_label: str, timeout: int = 300
+) -> pd.DataFrame:
+    """Download a previously created list and materialise it as a DataFrame."""
+    url = f"{API_BASE}{DOWNLOAD_PATH}"
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "text/csv",
+        "Accept-Encoding": "gzip, deflate",
+    }
+    payload = {
+        "id": list_id,
+        "download_type": "biomarker_list",
+        "format": "csv",
+        "compressed": True,
+    }
+
+    try:
+        _, body = await _post(session, url, payload, headers, timeout)
+        body = await asyncio.to_thread(_gunzip_if_needed, body)
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError, EOFError, zlib.error) as exc:
+        raise BiomarkerKBError(
+            f"Data download failed for {expect_label!r}: {exc}"
+        ) from exc
+
+    if not _has_data_rows(body):
+        return pd.DataFrame()
+
+    try:
+        # Parsing is CPU-bound; keep it off the event loop so other downloads progress.
+        return await asyncio.to_thread(_parse_csv, body)
+    except BiomarkerKBError:
+        # When CSV parsing fails, fall back to JSON download and convert manually.
+        json_payload = dict(payload, format="json", compressed=False)
+        try:
+            _, json_body = await _post(session, url, json_payload, headers, timeout)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise BiomarkerKBError(
+                f"CSV parsing failed and JSON fallback also errored for {expect_label!r}: {exc}"
+            ) from exc
+
+        try:
+            parsed = json.loads(json_body)
+        except ValueError as exc:  # JSONDecodeError or a non-UTF-8 body
+            raise BiomarkerKBError(
+                "BiomarkerKB JSON fallback payload was malformed. "
+                "Body snippet: %r" % json_body[:500].decode("utf-8", "replace")
+            ) from exc
+
+        if isinstance(parsed, list):
+            return pd.DataFrame(parsed)
+
+        raise BiomarkerKBError(
+            "Unexpected JSON structure received from BiomarkerKB download endpoint."
+        )
+
+
+async def download_with_size_escalation(
+    session: aiohttp.ClientSession,
+    *,
+    payload_factory: Callable[[Optional[int]], Dict[str, object]],
+    description: str,
+    expect_label: str,
+    initial_size: Optional[int],
+    max_attempts: int = 4,
+    logger: Callable[[str], None] = _default_log,
+) -> Optional[pd.DataFrame]:
+    """Async version of :func:`bkb_client.download_with_size_escalation`."""
+    attempt_size = _probe_size(initial_size, max_attempts)
+    attempts = 0
+    previous_row_count: Optional[int] = None
+
+    while True:
+        logger(
+            "🔬 Creating a search list for %s (size=%s)..." % (description, attempt_size or "auto")
+        )
+        request = ListRequest(payload=payload_factory(attempt_size), description=description)
+        cached = await asyncio.to_thread(_load_cached_attempt, request, logger)
+        if cached is not None:
+            listing, df = cached
+        else:
+            try:
+                listing = await create_list(session, request)
+                resized = _resize_for_hits(listing, attempt_size, logger)
+                if resized is not None:
+                    attempt_size = resized
+                    listing = await create_list(
+                        session,
+                        ListRequest(payload=payload_factory(attempt_size), description=description),
+                    )
+            except BiomarkerKBError as exc:
+                logger(f"  ❌ API request failed for {description!r}: {exc}")
+                return None
+
+            logger(f"📂 Downloading data for List ID: {listing.list_id}...")
+            try:
+                df = await download_list(session, listing.list_id, expect_label=expect_label)
+            except BiomarkerKBError as exc:
+                logger(f"  ❌ Data download or parsing failed for {description!r}: {exc}")
+                return None
+            await asyncio.to_thread(_cache_store, request.payload, df, listing)
+
+        attempts += 1
+        next_size = _finish_attempt(
+            df,
+            listing,
+            attempt_size=attempt_size,
+            previous_row_count=previous_row_count,
+            attempts=attempts,
+            max_attempts=max_attempts,
+            description=description,
+            logger=logger,
+        )
+        if next_size is None:
+            return df
+
+        previous_row_count = len(df)
+        attempt_size = next_size
@@ -1,23 +1,124 @@
 """Thin client for interacting with BiomarkerKB HTTP API."""
 from __future__ import annotations
 
+import gzip
+import hashlib
 import io
 import json
+import os
+import threading
+import time
+import zlib
 from dataclasses import dataclass
-from typing import Callable, Dict, Iterable, Optional
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Optional, Union
 
 import pandas as pd
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import pyarrow  # noqa: F401  (only needed as a pandas engine/dtype backend)
+except ImportError:
+    _HAS_PYARROW = False
+    _CSV_READ_OPTIONS: Dict[str, str] = {}
+else:
+    _HAS_PYARROW = True
+    _CSV_READ_OPTIONS = {"engine": "pyarrow", "dtype_backend": "pyarrow"}
 
 API_BASE = "https://api.biomarkerkb.org"
 SEARCH_PATH = "/biomarker/search"
 DOWNLOAD_PATH = "/data/list_download"
 
+# --- On-disk cache of downloaded lists ---
+# Set BKB_CACHE_DISABLE=1 to always hit the API; BKB_CACHE_MAX_AGE (seconds) expires old entries.
+CACHE_DIR = Path(os.environ.get("BKB_CACHE_DIR", ".bkb_cache"))
+CACHE_VERSION = 2
+
+# Bytes buffered from a streamed download before deciding whether it holds any rows.
+_PEEK_BYTES = 64 * 1024
+
+# compressed=True downloads arrive as a gzip file rather than via Content-Encoding.
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# Retry policy for 429/5xx responses, shared by the blocking and the async client.
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+# urllib3's own cap on backoff sleeps; Retry only accepts it as an argument from 2.0 on.
+RETRY_BACKOFF_MAX = 120.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Client-side ceiling on API calls, shared by every thread and coroutine.
+RATE_LIMIT_PER_SECOND = 10.0
+RATE_LIMIT_BURST = 20
+
 
 class BiomarkerKBError(RuntimeError):
     """Raised when the BiomarkerKB API request cannot be satisfied."""
 
 
+class TokenBucket:
+    """Thread-safe token bucket allowing *rate* calls per second with bursts of *burst*."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is debt owed by callers that are already waiting.
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+_BUCKET = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+
+class _RateLimitedRetry(Retry):
+    """urllib3 Retry that also takes a rate-limit token before each re-sent request.
+
+    Retries happen inside the adapter, below the ``_BUCKET.acquire()`` in each call,
+    so without this they would bypass the limiter that the async client honours.
+    """
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        _BUCKET.acquire()
+
+
+# Shared session so consecutive calls reuse pooled keep-alive connections instead of
+# paying a TCP+TLS handshake per request. Both endpoints are POST, so retries must
+# opt in to that method explicitly.
+_RETRY = _RateLimitedRetry(
+    total=RETRY_TOTAL,
+    backoff_factor=RETRY_BACKOFF,
+    status_forcelist=RETRY_STATUSES,
+    allowed_methods=frozenset({"POST"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=_RETRY)
+)
+
+
 @dataclass(frozen=True)
 class ListRequest:
     """Parameters that drive creation of temporary server-side lists."""
@@ -26,6 +127,18 @@ class ListRequest:
     description: str
 
 
+@dataclass(frozen=True)
+class ListResult:
+    """Identifier of a created list plus the hit count the search reported, if any."""
+
+    list_id: str
+    total_hits: Optional[int] = None
+
+
+# Search response fields that may carry the number of matching records.
+_TOTAL_HIT_FIELDS = ("total_hits", "total", "hits", "count", "total_length")
+
+
 def _safe_json(response: requests.Response) -> Dict[str, object]:
     """Parse JSON responses while surfacing malformed payloads as rich errors."""
     try:
@@ -38,76 +151,231 @@ def _safe_json(response: requests.Response) -> Dict[str, object]:
         ) from exc
 
 
-def create_list(list_request: ListRequest, timeout: int = 60) -> Optional[str]:
-    """Create a BiomarkerKB list and return its identifier."""
+def _cache_paths(payload: Dict[str, object]) -> tuple[Path, Path]:
+    """Return the (data, metadata) paths for the cache entry belonging to *payload*."""
+    key = hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{key}.feather", CACHE_DIR / f"{key}.json"
+
+
+def _cache_enabled() -> bool:
+    return os.environ.get("BKB_CACHE_DISABLE", "").lower() not in {"1", "true", "yes"}
+
+
+def _cache_load(payload: Dict[str, object]) -> Optional[tuple[ListResult, pd.DataFrame]]:
+    """Return the cached list and download for a search *payload*, or ``None`` on a miss."""
+    if not _cache_enabled():
+        return None
+
+    data_path, meta_path = _cache_paths(payload)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    max_age = os.environ.get("BKB_CACHE_MAX_AGE")
+    if max_age and time.time() - float(meta.get("created", 0)) > float(max_age):
+        return None
+
+    try:
+        df = pd.read_feather(data_path)
+    except (OSError, ValueError, ImportError):
+        return None
+    return ListResult(str(meta.get("list_id")), meta.get("total_hits")), df
+
+
+def _cache_store(payload: Dict[str, object], df: pd.DataFrame, listing: ListResult) -> None:
+    """Persist a downloaded list; failures only cost a future cache miss."""
+    # Empty results are not stored so "No data found" is looked up again next run.
+    if not _cache_enabled() or df.empty:
+        return
+
+    data_path, meta_path = _cache_paths(payload)
+    meta = {
+        "version": CACHE_VERSION,
+        "created": time.time(),
+        "list_id": listing.list_id,
+        "total_hits": listing.total_hits,
+        "rows": len(df),
+        "payload": payload,
+    }
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.reset_index(drop=True).to_feather(data_path)
+        # The metadata file is written last so a partial write never looks like a hit.
+        meta_path.write_text(json.dumps(meta, sort_keys=True), encoding="utf-8")
+    except (OSError, ValueError, TypeError, ImportError):
+        return
+
+
+def _list_result(data: Dict[str, object], list_request: ListRequest) -> ListResult:
+    """Extract the list identifier and any reported hit count from a search response."""
+    list_id = data.get("list_id")
+    if not list_id:
+        raise BiomarkerKBError(
+            f"BiomarkerKB search response for {list_request.description!r} did not contain a 'list_id'."
+        )
+
+    total_hits: Optional[int] = None
+    for field in _TOTAL_HIT_FIELDS:
+        value = data.get(field)
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            total_hits = value
+            break
+    return ListResult(str(list_id), total_hits)
+
+
+def create_list(list_request: ListRequest, timeout: int = 60) -> ListResult:
+    """Create a BiomarkerKB list and return its identifier and reported hit count."""
     url = f"{API_BASE}{SEARCH_PATH}"
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
+    _BUCKET.acquire()
     try:
-        response = requests.post(url, json=list_request.payload, headers=headers, timeout=timeout)
+        response = _SESSION.post(url, json=list_request.payload, headers=headers, timeout=timeout)
         response.raise_for_status()
     except requests.exceptions.RequestException as exc:
         raise BiomarkerKBError(
             f"Search request failed for {list_request.description!r}: {exc}"
         ) from exc
 
-    data = _safe_json(response)
-    list_id = data.get("list_id")
-    if not list_id:
-        raise BiomarkerKBError(
-            f"BiomarkerKB search response for {list_request.description!r} did not contain a 'list_id'."
-        )
-    return str(list_id)
+    return _list_result(_safe_json(response), list_request)
+
+
+def _has_timezone(dtype: object) -> bool:
+    """Return whether *dtype* is a timezone-aware timestamp (numpy- or Arrow-backed)."""
+    if isinstance(dtype, pd.ArrowDtype):
+        dtype = dtype.pyarrow_dtype
+    return getattr(dtype, "tz", None) is not None
+
+
+def _is_aware(value: object) -> bool:
+    return isinstance(value, datetime) and value.tzinfo is not None
+
 
+def _naive_utc(value: object) -> object:
+    if _is_aware(value):
+        return pd.Timestamp(value).tz_convert("UTC").tz_localize(None)
+    return value
 
-def _parse_csv(data: str) -> pd.DataFrame:
-    """Convert CSV text into a DataFrame while catching parser edge cases."""
-    buffer = io.StringIO(data)
+
+def _strip_timezones(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert timezone-aware timestamps to naive UTC, the only form Excel can store.
+
+    Besides timestamp columns this covers object columns, which is what a concat
+    produces when one frame parsed a column as timestamps and another as text.
+    """
+    converted = {}
+    for column in df.columns:
+        series = df[column]
+        if _has_timezone(series.dtype):
+            converted[column] = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        elif series.dtype == object and series.map(_is_aware).any():
+            converted[column] = series.map(_naive_utc)
+    return df.assign(**converted) if converted else df
+
+
+def _parse_csv(data: Union[bytes, BinaryIO]) -> pd.DataFrame:
+    """Convert CSV bytes or a binary stream into a DataFrame while catching parser edge cases."""
+    buffer = io.BytesIO(data) if isinstance(data, bytes) else data
     try:
-        return pd.read_csv(buffer)
+        # The Arrow reader is multithreaded and decodes UTF-8 itself.
+        df = pd.read_csv(buffer, **_CSV_READ_OPTIONS)
     except pd.errors.EmptyDataError:
         # The API explicitly told us there are no rows.
         return pd.DataFrame()
-    except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+    except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as exc:
+        # pyarrow.ArrowInvalid derives from ValueError and is not always re-wrapped by pandas.
         raise BiomarkerKBError(
             f"CSV parsing failed with error: {exc}."
         ) from exc
+    # The Arrow reader turns ISO strings ending in "Z" into tz-aware timestamps; strip the
+    # zone per frame so frames from different biomarkers concatenate cleanly.
+    return _strip_timezones(df)
+
+
+def _has_data_rows(body: bytes) -> bool:
+    """Return whether a CSV body continues past its header line, without decoding it."""
+    newline = body.find(b"\n")
+    return 0 <= newline < len(body) - 1
+
+
+def _gunzip_if_needed(body: bytes) -> bytes:
+    """Return *body* decompressed when it is a gzip file, unchanged otherwise."""
+    if body[:2] == _GZIP_MAGIC:
+        return gzip.decompress(body)
+    return body
+
+
+def _parse_csv_stream(response: requests.Response) -> pd.DataFrame:
+    """Parse a streamed CSV response without first buffering the whole body."""
+    response.raw.decode_content = True
+    # urllib3 closes the raw stream once the body is consumed, which makes the
+    # BufferedReader around it fail with "I/O operation on closed file".
+    response.raw.auto_close = False
+    stream = io.BufferedReader(response.raw, buffer_size=_PEEK_BYTES)
+    if stream.peek(2)[:2] == _GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=stream)
+    if _has_data_rows(stream.peek(_PEEK_BYTES)):
+        return _parse_csv(stream)
+
+    # Either the body is at most a header line, or its first line is longer than the
+    # peek window. Read it whole to decide: cheap in the first case, and in the second
+    # (not seen from this API) the body is buffered in memory rather than streamed.
+    body = stream.read()
+    if not _has_data_rows(body):
+        return pd.DataFrame()
+    return _parse_csv(body)
 
 
 def download_list(list_id: str, *, expect_label: str, timeout: int = 300) -> pd.DataFrame:
     """Download a previously created list and materialise it as a DataFrame."""
     url = f"{API_BASE}{DOWNLOAD_PATH}"
-    headers = {"Content-Type": "application/json", "Accept": "text/csv"}
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "text/csv",
+        "Accept-Encoding": "gzip, deflate",
+    }
     payload = {
         "id": list_id,
         "download_type": "biomarker_list",
         "format": "csv",
-        "compressed": False,
+        "compressed": True,
     }
 
+    _BUCKET.acquire()
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=timeout)
+        response = _SESSION.post(url, json=payload, headers=headers, timeout=timeout, stream=True)
         response.raise_for_status()
     except requests.exceptions.RequestException as exc:
         raise BiomarkerKBError(
             f"Data download failed for {expect_label!r}: {exc}"
         ) from exc
 
-    if not response.text or len(response.text.splitlines()) <= 1:
-        return pd.DataFrame()
-
     try:
-        return _parse_csv(response.text)
+        with response:
+            return _parse_csv_stream(response)
+    except (
+        requests.exceptions.RequestException,
+        urllib3.exceptions.HTTPError,
+        OSError,
+        EOFError,
+        ValueError,
+        zlib.error,
+    ) as exc:
+        # Network and decompression failures surface while pandas is still reading the
+        # stream; a peek at a stream that is already closed raises ValueError. Parser
+        # errors never get here because _parse_csv turns them into BiomarkerKBError.
+        raise BiomarkerKBError(
+            f"Data download failed for {expect_label!r}: {exc}"
+        ) from exc
     except BiomarkerKBError:
         # When CSV parsing fails, fall back to JSON download and convert manually.
-        json_payload = {
-            "id": list_id,
-            "download_type": "biomarker_list",
-            "format": "json",
-            "compressed": False,
-        }
+        json_payload = dict(payload, format="json", compressed=False)
+        _BUCKET.acquire()
         try:
-            json_resp = requests.post(url, json=json_payload, headers=headers, timeout=timeout)
+            json_resp = _SESSION.post(url, json=json_payload, headers=headers, timeout=timeout)
             json_resp.raise_for_status()
         except requests.exceptions.RequestException as exc:
             raise BiomarkerKBError(
@@ -143,10 +411,132 @@ def ensure_complete_results(df: pd.DataFrame, *, page_hint: Optional[int] = None
         )
 
 
+def compact_dtypes(df: pd.DataFrame, *, max_category_ratio: float = 0.1) -> pd.DataFrame:
+    """Return *df* with Arrow-backed dtypes and low-cardinality text columns as categories.
+
+    Timezone-aware timestamps are converted to naive UTC, since Excel cannot store them.
+    """
+    if df.empty:
+        return df
+
+    df = _strip_timezones(df)
+    df = df.convert_dtypes(dtype_backend="pyarrow") if _HAS_PYARROW else df.convert_dtypes()
+    categories = {
+        column: "category"
+        for column in df.columns
+        if pd.api.types.is_string_dtype(df[column])
+        and df[column].nunique() <= max_category_ratio * len(df)
+    }
+    return df.astype(categories) if categories else df
+
+
+def write_excel(df: pd.DataFrame, path: str) -> None:
+    """Write *df* to an ``.xlsx`` workbook at *path* using the xlsxwriter engine."""
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False)
+
+
 def _default_log(message: str) -> None:
     print(message)
 
 
+def _probe_size(initial_size: Optional[int], max_attempts: int) -> Optional[int]:
+    """Return the page size of the first request: the largest one escalation would try."""
+    if initial_size is None:
+        return None
+    return initial_size << max(max_attempts - 1, 0)
+
+
+def _next_attempt_size(
+    *,
+    row_count: int,
+    attempt_size: Optional[int],
+    previous_row_count: Optional[int],
+    attempts: int,
+    max_attempts: int,
+    logger: Callable[[str], None],
+) -> Optional[int]:
+    """Return the page size for the next attempt, or ``None`` when the download is final."""
+    if attempt_size is None or row_count == 0:
+        return None
+
+    if row_count < attempt_size:
+        return None
+
+    if previous_row_count == row_count:
+        logger(
+            "  ⚠️ Received the same row count on consecutive attempts; assuming the dataset is complete."
+        )
+        return None
+
+    if attempts >= max_attempts:
+        logger(
+            "  ⚠️ Reached the maximum number of size escalation attempts. "
+            "Proceeding with the most recent download."
+        )
+        return None
+
+    next_size = attempt_size * 2
+    logger(
+        "  ⚠️ Row count matches the requested page size. Retrying with a larger size (%s)."
+        % next_size
+    )
+    return next_size
+
+
+def _load_cached_attempt(
+    request: ListRequest, logger: Callable[[str], None]
+) -> Optional[tuple[ListResult, pd.DataFrame]]:
+    """Return the cached list and download for *request*, logging when one is used."""
+    cached = _cache_load(request.payload)
+    if cached is not None:
+        logger(f"💾 Using cached download for {request.description!r}.")
+    return cached
+
+
+def _resize_for_hits(
+    listing: ListResult, attempt_size: Optional[int], logger: Callable[[str], None]
+) -> Optional[int]:
+    """Return the size to recreate the list at when the search reported more hits.
+
+    Recreating the list once is cheaper than downloading a truncated page and
+    escalating; ``None`` means *listing* can be downloaded as it is.
+    """
+    if attempt_size is None or listing.total_hits is None or listing.total_hits <= attempt_size:
+        return None
+    logger(f"  ℹ️ Search reports {listing.total_hits} hits; recreating the list at that size.")
+    return listing.total_hits
+
+
+def _finish_attempt(
+    df: pd.DataFrame,
+    listing: ListResult,
+    *,
+    attempt_size: Optional[int],
+    previous_row_count: Optional[int],
+    attempts: int,
+    max_attempts: int,
+    description: str,
+    logger: Callable[[str], None],
+) -> Optional[int]:
+    """Log a finished attempt and return the next page size, or ``None`` when *df* is final."""
+    if listing.total_hits is not None:
+        # The list was sized from the reported hit count, so it is complete.
+        logger(f"  ✅ Retrieved {len(df)} of {listing.total_hits} rows for {description!r}.")
+        return None
+
+    ensure_complete_results(df, page_hint=attempt_size)
+    logger(f"  ✅ Retrieved {len(df)} rows for {description!r}.")
+    return _next_attempt_size(
+        row_count=len(df),
+        attempt_size=attempt_size,
+        previous_row_count=previous_row_count,
+        attempts=attempts,
+        max_attempts=max_attempts,
+        logger=logger,
+    )
+
+
 def download_with_size_escalation(
     *,
     payload_factory: Callable[[Optional[int]], Dict[str, object]],
@@ -156,8 +546,13 @@ def download_with_size_escalation(
     max_attempts: int = 4,
     logger: Callable[[str], None] = _default_log,
 ) -> Optional[pd.DataFrame]:
-    """Create a list and download it, retrying with larger page sizes when needed."""
-    attempt_size = initial_size
+    """Create a list and download it, retrying with larger page sizes when needed.
+
+    The first request already uses the largest size the escalation would reach
+    (``initial_size * 2 ** (max_attempts - 1)``); doubling only continues if even
+    that page comes back full.
+    """
+    attempt_size = _probe_size(initial_size, max_attempts)
     attempts = 0
     previous_row_count: Optional[int] = None
 
@@ -166,51 +561,46 @@ def download_with_size_escalation(
             "🔬 Creating a search list for %s (size=%s)..." % (description, attempt_size or "auto")
         )
         request = ListRequest(payload=payload_factory(attempt_size), description=description)
-        try:
-            list_id = create_list(request)
-        except BiomarkerKBError as exc:
-            logger(f"  ❌ API request failed for {description!r}: {exc}")
-            return None
-
-        logger(f"📂 Downloading data for List ID: {list_id}...")
-        try:
-            df = download_list(list_id, expect_label=expect_label)
-        except BiomarkerKBError as exc:
-            logger(f"  ❌ Data download or parsing failed for {description!r}: {exc}")
-            return None
-
-        ensure_complete_results(df, page_hint=attempt_size)
-        row_count = len(df)
-        logger(f"  ✅ Retrieved {row_count} rows for {description!r}.")
-
-        if attempt_size is None or row_count == 0:
-            return df
-
-        if row_count < attempt_size:
-            return df
-
-        if previous_row_count == row_count:
-            logger(
-                "  ⚠️ Received the same row count on consecutive attempts; assuming the dataset is complete."
-            )
-            return df
+        cached = _load_cached_attempt(request, logger)
+        if cached is not None:
+            listing, df = cached
+        else:
+            try:
+                listing = create_list(request)
+                resized = _resize_for_hits(listing, attempt_size, logger)
+                if resized is not None:
+                    attempt_size = resized
+                    listing = create_list(
+                        ListRequest(payload=payload_factory(attempt_size), description=description)
+                    )
+            except BiomarkerKBError as exc:
+                logger(f"  ❌ API request failed for {description!r}: {exc}")
+                return None
+
+            logger(f"📂 Downloading data for List ID: {listing.list_id}...")
+            try:
+                df = download_list(listing.list_id, expect_label=expect_label)
+            except BiomarkerKBError as exc:
+                logger(f"  ❌ Data download or parsing failed for {description!r}: {exc}")
+                return None
+            _cache_store(request.payload, df, listing)
 
         attempts += 1
-        if attempts >= max_attempts:
-            logger(
-                "  ⚠️ Reached the maximum number of size escalation attempts. "
-                "Proceeding with the most recent download."
-            )
-            return df
-
-        previous_row_count = row_count
-        if attempt_size is not None:
-            attempt_size *= 2
-        logger(
-            "  ⚠️ Row count matches the requested page size. Retrying with a larger size (%s)."
-            % (attempt_size or "auto")
+        next_size = _finish_attempt(
+            df,
+            listing,
+            attempt_size=attempt_size,
+            previous_row_count=previous_row_count,
+            attempts=attempts,
+            max_attempts=max_attempts,
+            description=description,
+            logger=logger,
         )
+        if next_size is None:
+            return df
 
+        previous_row_count = len(df)
+        attempt_size = next_size
 
 
 def chunk(iterable: Iterable[str], size: int) -> Iterable[list[str]]: